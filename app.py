@@ -1,19 +1,41 @@
 # app.py
 import os
+import base64
 import time
 import uuid
-import requests
-from io import BytesIO
-from datetime import datetime
+import math
+import threading
+import functools
+from collections import deque
+from concurrent import futures
+import orjson
+import httpx
+from io import BytesIO, RawIOBase
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from PIL import Image
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import NoCredentialsError, ClientError
 
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, so jsonify and request.json skip the stdlib json module."""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__, static_folder="static", template_folder="static")
+app.json = OrjsonProvider(app)
 
 # --- Config / Env ---
 DO_INFERENCE_BASE = "https://inference.do-ai.run/v1/async-invoke"
+_STATUS_URL_TPL = DO_INFERENCE_BASE + "/{}/status"
+_RESULT_URL_TPL = DO_INFERENCE_BASE + "/{}"
 DO_MODEL_ACCESS_KEY = os.getenv("DO_MODEL_ACCESS_KEY")  # Required
 if not DO_MODEL_ACCESS_KEY:
     # don't raise here so app can still run in dev, but warn
@@ -24,48 +46,106 @@ DO_INFERENCE_HEADERS = {
     "Content-Type": "application/json",
 }
 
+# DO request timeouts. Connects get their own shorter timeout and are retried by the transport.
+HTTP_CONNECT_TIMEOUT = 5.0
+HTTP_CONNECT_RETRIES = 3
+START_TIMEOUT = httpx.Timeout(30.0, connect=HTTP_CONNECT_TIMEOUT)
+STATUS_TIMEOUT = httpx.Timeout(10.0, connect=HTTP_CONNECT_TIMEOUT)
+RESULT_TIMEOUT = httpx.Timeout(60.0, connect=HTTP_CONNECT_TIMEOUT)
+IMAGE_TIMEOUT = httpx.Timeout(30.0, connect=HTTP_CONNECT_TIMEOUT)
+
+def _worst_case_call_seconds(timeout: httpx.Timeout) -> float:
+    """Upper bound for one request: pool wait, every connect attempt plus retry backoff, write and read."""
+    # httpcore backs off 0s, 0.5s, 1s, 2s, ... between connect attempts
+    backoff = sum(0.5 * 2 ** (n - 1) for n in range(1, HTTP_CONNECT_RETRIES))
+    attempts = HTTP_CONNECT_RETRIES + 1
+    return timeout.pool + attempts * timeout.connect + backoff + timeout.write + timeout.read
+
+# Shared HTTP/2 client so status polls, result fetches and image downloads reuse multiplexed keep-alive connections
+# (httpx sends Accept-Encoding: gzip by default, so JSON payloads transfer compressed)
+HTTP = httpx.Client(
+    headers=DO_INFERENCE_HEADERS,
+    timeout=httpx.Timeout(30.0, connect=HTTP_CONNECT_TIMEOUT),
+    transport=httpx.HTTPTransport(
+        http2=True,
+        retries=HTTP_CONNECT_RETRIES,  # connection-level retries
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+    )
+)
+
 # DigitalOcean Spaces configuration (same as your old app)
 SPACES_BUCKET = os.getenv("SPACES_BUCKET", "photosnap-bucket")
 SPACES_REGION = os.getenv("SPACES_REGION", "sgp1")
 SPACES_ENDPOINT = os.getenv("SPACES_ENDPOINT", f"https://{SPACES_REGION}.digitaloceanspaces.com")
 DO_SPACES_KEY = os.getenv("DO_SPACES_KEY")
 DO_SPACES_SECRET = os.getenv("DO_SPACES_SECRET")
+SPACES_MAX_POOL_CONNECTIONS = int(os.getenv("SPACES_MAX_POOL_CONNECTIONS", "50"))  # botocore default is 10
+# Uploads above the threshold are split into parts and sent concurrently
+SPACES_TRANSFER_CONFIG = TransferConfig(multipart_threshold=5 * 1024 * 1024, max_concurrency=8, use_threads=True)
 
 # Polling configuration for async jobs
-DEFAULT_POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "2.0"))   # seconds between polls
+DEFAULT_POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "0.3"))   # initial seconds between polls
+DEFAULT_POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", "3.0"))  # cap for the backoff delay
+POLL_BACKOFF_FACTOR = float(os.getenv("POLL_BACKOFF_FACTOR", "1.25"))  # delay multiplier after each poll
 DEFAULT_POLL_TIMEOUT = int(os.getenv("POLL_TIMEOUT", "60"))       # total seconds to wait before timing out
 
-# --- Utilities: Spaces client & upload ---
-def configure_spaces_client():
-    """Configure boto3 client for DigitalOcean Spaces"""
-    try:
-        session = boto3.session.Session()
-        s3_client = session.client(
-            's3',
-            region_name=SPACES_REGION,
-            endpoint_url=SPACES_ENDPOINT,
-            aws_access_key_id=DO_SPACES_KEY,
-            aws_secret_access_key=DO_SPACES_SECRET
-        )
-        return s3_client
-    except Exception as e:
-        app.logger.error(f"Failed to configure DigitalOcean Spaces client: {e}")
-        return None
+# Bulkheads: max concurrent inference jobs per route; excess requests are rejected with 503
+GENERATE_MAX_CONCURRENCY = int(os.getenv("GENERATE_MAX_CONCURRENCY", "16"))
+UPLOAD_MAX_CONCURRENCY = int(os.getenv("UPLOAD_MAX_CONCURRENCY", "8"))
+# Longest a run_inference call can legitimately take: the start request, the polling window, one more
+# status request started just before the poll deadline, and the result fetch
+INFERENCE_WAIT_TIMEOUT = (
+    _worst_case_call_seconds(START_TIMEOUT)
+    + DEFAULT_POLL_TIMEOUT
+    + _worst_case_call_seconds(STATUS_TIMEOUT)
+    + _worst_case_call_seconds(RESULT_TIMEOUT)
+)
 
-def upload_to_spaces(image_bytes: bytes, filename: str):
-    """Upload image bytes to DigitalOcean Spaces and return public URL (or None)"""
-    s3 = configure_spaces_client()
+# --- Utilities: Spaces client & upload ---
+# boto3 clients are thread-safe, so a single client (and its connection pool) is shared by all requests
+_SPACES_CLIENT = None
+_SPACES_CLIENT_LOCK = threading.Lock()
+
+def get_spaces_client():
+    """Return the shared boto3 client for DigitalOcean Spaces, creating it on first use"""
+    global _SPACES_CLIENT
+    if _SPACES_CLIENT is not None:
+        return _SPACES_CLIENT
+    with _SPACES_CLIENT_LOCK:
+        if _SPACES_CLIENT is None:
+            try:
+                session = boto3.session.Session()
+                _SPACES_CLIENT = session.client(
+                    's3',
+                    region_name=SPACES_REGION,
+                    endpoint_url=SPACES_ENDPOINT,
+                    aws_access_key_id=DO_SPACES_KEY,
+                    aws_secret_access_key=DO_SPACES_SECRET,
+                    config=Config(
+                        max_pool_connections=SPACES_MAX_POOL_CONNECTIONS,
+                        retries={'max_attempts': 3, 'mode': 'standard'},
+                        tcp_keepalive=True
+                    )
+                )
+            except Exception as e:
+                app.logger.error(f"Failed to configure DigitalOcean Spaces client: {e}")
+                return None
+    return _SPACES_CLIENT
+
+def upload_to_spaces(image_file, filename: str):
+    """Upload an image file-like object to DigitalOcean Spaces and return public URL (or None)"""
+    s3 = get_spaces_client()
     if not s3:
         app.logger.error("Spaces client not configured")
         return None
 
     try:
-        s3.put_object(
-            Bucket=SPACES_BUCKET,
-            Key=filename,
-            Body=image_bytes,
-            ContentType='image/png',
-            ACL='public-read'
+        s3.upload_fileobj(
+            image_file,
+            SPACES_BUCKET,
+            filename,
+            ExtraArgs={'ContentType': 'image/png', 'ACL': 'public-read'},
+            Config=SPACES_TRANSFER_CONFIG
         )
         url = f"https://{SPACES_BUCKET}.{SPACES_REGION}.digitaloceanspaces.com/{filename}"
         return url
@@ -79,7 +159,106 @@ def upload_to_spaces(image_bytes: bytes, filename: str):
         app.logger.error(f"Unexpected error during upload: {e}")
         return None
 
+# --- Utilities: circuit breaker for DO inference calls ---
+class BreakerOpen(Exception):
+    """Raised instead of calling DO inference while the circuit breaker is open."""
+    def __init__(self, retry_after: float):
+        super().__init__(f"DO inference temporarily unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class _Breaker:
+    """
+    Minimal Hystrix-style circuit breaker.
+    CLOSED: calls pass through; once the rolling window holds at least request_volume_threshold calls
+            and error_threshold_percentage of them failed, the breaker trips to OPEN.
+    OPEN: calls fail fast with BreakerOpen until sleep_window_seconds have elapsed.
+    HALF_OPEN: a single probe call is let through; success closes the breaker, failure re-opens it.
+    """
+    CLOSED, OPEN, HALF_OPEN = "CLOSED", "OPEN", "HALF_OPEN"
+
+    def __init__(self, request_volume_threshold: int = 5, error_threshold_percentage: int = 50,
+                 sleep_window_seconds: float = 10.0, rolling_window_seconds: float = 10.0):
+        self.request_volume_threshold = request_volume_threshold
+        self.error_threshold_percentage = error_threshold_percentage
+        self.sleep_window_seconds = sleep_window_seconds
+        self.rolling_window_seconds = rolling_window_seconds
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+        self._events = deque()  # (timestamp, succeeded)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        # bumped on every state change; results of calls admitted under an older generation are ignored
+        self._generation = 0
+
+    def _set_state(self, state: str, now: float):
+        self.state = state
+        self._generation += 1
+        self._events.clear()
+        self._probe_in_flight = False
+        if state == self.OPEN:
+            self._opened_at = now
+
+    def _before_call(self) -> int:
+        """Admit a call or raise BreakerOpen. Returns the generation the call was admitted under."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return self._generation
+            now = time.monotonic()
+            remaining = self.sleep_window_seconds - (now - self._opened_at)
+            if self.state == self.OPEN and remaining <= 0:
+                self._set_state(self.HALF_OPEN, now)
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return self._generation
+            raise BreakerOpen(max(remaining, 1.0))
+
+    def _record(self, generation: int, succeeded: bool):
+        with self._lock:
+            if generation != self._generation:
+                # admitted before the last state change (e.g. a slow call finishing after the breaker
+                # tripped), so it says nothing about the current state
+                return
+            now = time.monotonic()
+            if self.state == self.HALF_OPEN:
+                if succeeded:
+                    self._set_state(self.CLOSED, now)
+                else:
+                    self._set_state(self.OPEN, now)
+                    app.logger.warning("DO inference circuit breaker re-opened after failed probe")
+                return
+            self._events.append((now, succeeded))
+            while self._events and now - self._events[0][0] > self.rolling_window_seconds:
+                self._events.popleft()
+            total = len(self._events)
+            failures = sum(1 for _, ok in self._events if not ok)
+            if total >= self.request_volume_threshold and failures * 100 >= self.error_threshold_percentage * total:
+                self._set_state(self.OPEN, now)
+                app.logger.warning(f"DO inference circuit breaker opened ({failures}/{total} calls failed)")
+
+    def guard(self, func):
+        """Decorator that routes calls through the breaker."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            generation = self._before_call()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self._record(generation, not _is_upstream_failure(e))
+                raise
+            self._record(generation, True)
+            return result
+        return wrapper
+
+def _is_upstream_failure(exc: Exception) -> bool:
+    """Connection errors, timeouts and 5xx count against the breaker; 4xx means the upstream is healthy."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+DO_INFERENCE_BREAKER = _Breaker()
+
 # --- Utilities: DigitalOcean serverless inference flow ---
+@DO_INFERENCE_BREAKER.guard
 def start_async_inference(model_id: str, input_payload: dict, tags: list = None):
     """
     Starts an async invoke job on DO serverless inference.
@@ -90,28 +269,64 @@ def start_async_inference(model_id: str, input_payload: dict, tags: list = None)
         body["tags"] = tags
 
     # DO_INFERENCE_BASE already points to /v1/async-invoke, so POST there
-    resp = requests.post(f"{DO_INFERENCE_BASE}", headers=DO_INFERENCE_HEADERS, json=body, timeout=30)
+    resp = HTTP.post(DO_INFERENCE_BASE, content=orjson.dumps(body), timeout=START_TIMEOUT)
     resp.raise_for_status()
-    return resp.json()
+    return orjson.loads(resp.content)
 
-def get_job_status(request_id: str):
-    """Check status of async job."""
+@DO_INFERENCE_BREAKER.guard
+def get_job_status(request_id: str, etag: str = None):
+    """
+    Check status of async job. Returns (status JSON, Retry-After seconds or None, ETag or None).
+    If etag is given it is sent as If-None-Match; on 304 Not Modified the status JSON is None,
+    meaning the status is unchanged since that response.
+    """
     # Use the request id path under the base URL
-    resp = requests.get(f"{DO_INFERENCE_BASE}/{request_id}/status", headers=DO_INFERENCE_HEADERS, timeout=10)
+    headers = {"If-None-Match": etag} if etag else None
+    resp = HTTP.get(_STATUS_URL_TPL.format(request_id), headers=headers, timeout=STATUS_TIMEOUT)
+    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+    if resp.status_code == 304:
+        return None, retry_after, resp.headers.get("ETag") or etag
     resp.raise_for_status()
-    return resp.json()
+    return orjson.loads(resp.content), retry_after, resp.headers.get("ETag")
 
+@DO_INFERENCE_BREAKER.guard
 def get_job_result(request_id: str):
     """Fetch the final job result."""
-    resp = requests.get(f"{DO_INFERENCE_BASE}/{request_id}", headers=DO_INFERENCE_HEADERS, timeout=60)
+    resp = HTTP.get(_RESULT_URL_TPL.format(request_id), timeout=RESULT_TIMEOUT)
     resp.raise_for_status()
-    return resp.json()
+    return orjson.loads(resp.content)
 
-def poll_until_complete(request_id: str, timeout_seconds: int = DEFAULT_POLL_TIMEOUT, poll_interval: float = DEFAULT_POLL_INTERVAL):
-    """Poll the status endpoint until COMPLETE or timeout. Returns final status JSON once COMPLETE."""
+def parse_retry_after(value):
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds, or None if absent/invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+def poll_until_complete(request_id: str, timeout_seconds: int = DEFAULT_POLL_TIMEOUT, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                        max_poll_interval: float = DEFAULT_POLL_MAX_INTERVAL):
+    """
+    Poll the status endpoint until COMPLETE or timeout. Returns final status JSON once COMPLETE.
+    Starts with a short delay so fast jobs return quickly, then backs off up to max_poll_interval.
+    A Retry-After header on the status response can lengthen (but never shorten) the computed delay.
+    Repeat polls are conditional on the last ETag, so an unchanged status costs no body or parsing.
+    """
     start = time.time()
+    delay = poll_interval
+    status_json, etag = None, None
     while True:
-        status_json = get_job_status(request_id)
+        new_status, retry_after, etag = get_job_status(request_id, etag)
+        if new_status is not None:
+            status_json = new_status
         status_val = (status_json.get("status") or status_json.get("state") or "").upper()
         app.logger.debug(f"Job {request_id} status: {status_val} / {status_json}")
         if status_val in ("COMPLETE", "SUCCEEDED", "SUCCESS"):
@@ -119,25 +334,77 @@ def poll_until_complete(request_id: str, timeout_seconds: int = DEFAULT_POLL_TIM
             return get_job_result(request_id)
         if status_val in ("FAILED", "ERROR"):
             raise RuntimeError(f"Inference job failed: {status_json}")
-        if time.time() - start > timeout_seconds:
+        remaining = timeout_seconds - (time.time() - start)
+        if remaining <= 0:
             raise TimeoutError(f"Inference job polling timed out after {timeout_seconds}s")
-        time.sleep(poll_interval)
-
-# Helper: Download image bytes from URL or handle base64 inline
-def extract_image_bytes_from_result(result_json):
+        time.sleep(min(max(retry_after or 0.0, delay), remaining))
+        delay = min(delay * POLL_BACKOFF_FACTOR, max_poll_interval)
+
+class UnexpectedInferenceResponse(Exception):
+    """The async-invoke response did not contain a request id."""
+    def __init__(self, response):
+        super().__init__("Unexpected async-invoke response")
+        self.response = response
+
+def run_inference(model_id: str, input_payload: dict):
+    """Start an async job and poll it to completion. Returns the final result JSON."""
+    start_resp = start_async_inference(model_id=model_id, input_payload=input_payload)
+    # expected to contain a request id in several possible shapes
+    request_id = start_resp.get("request_id") or start_resp.get("id") or start_resp.get("requestId")
+    if not request_id:
+        raise UnexpectedInferenceResponse(start_resp)
+    return poll_until_complete(request_id, timeout_seconds=DEFAULT_POLL_TIMEOUT, poll_interval=DEFAULT_POLL_INTERVAL)
+
+# --- Utilities: bulkheads isolating each route's inference work ---
+class BulkheadFull(Exception):
+    """Raised when a route's bulkhead has no free slot."""
+
+class _Bulkhead:
     """
-    Try to find image bytes in a variety of result shapes:
+    Bounded worker pool for one route. Work runs on the pool's own threads and the semaphore
+    rejects new work immediately once every slot is busy, so a slow DO backend can only tie up
+    this route's quota rather than every server thread (keeping /health responsive).
+    """
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._executor = futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"bulkhead-{name}")
+
+    def run(self, func, *args, timeout: float, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise BulkheadFull(f"Too many concurrent {self.name} requests, try again shortly")
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        # the slot is freed when the work finishes, even if the caller stopped waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=timeout)
+        except futures.TimeoutError:
+            if future.done():
+                raise
+            raise TimeoutError(f"Inference job did not finish within {timeout}s")
+
+GENERATE_BULKHEAD = _Bulkhead("generate", GENERATE_MAX_CONCURRENCY)
+UPLOAD_BULKHEAD = _Bulkhead("upload", UPLOAD_MAX_CONCURRENCY)
+
+# Helpers: locate the image in a job result, then download it (buffered or streamed) or decode base64 inline
+IMAGE_STREAM_CHUNK_SIZE = 64 * 1024
+
+def find_image_source(result_json):
+    """
+    Try to find the image in a variety of result shapes:
      - result_json['output'] may be a list of items with 'url' or 'base64' or 'image' keys
      - result_json may contain 'url' at top-level
-     - If we find a URL, download it and return bytes
-    Returns a tuple: (bytes, mime) or (None, None)
+     - otherwise the first http(s) URL nested anywhere in the result
+    Returns a tuple: (url, None), (None, decoded bytes) or (None, None)
     """
     # 1) Top-level url
     url = result_json.get("url")
     if url:
-        resp = requests.get(url, timeout=30)
-        resp.raise_for_status()
-        return resp.content, resp.headers.get("Content-Type", "image/png")
+        return url, None
 
     # 2) Output array
     output = result_json.get("output") or result_json.get("outputs") or result_json.get("results")
@@ -146,40 +413,108 @@ def extract_image_bytes_from_result(result_json):
         # possible keys: url, base64, b64, image
         if isinstance(item, dict):
             if item.get("url"):
-                resp = requests.get(item["url"], timeout=30)
-                resp.raise_for_status()
-                return resp.content, resp.headers.get("Content-Type", "image/png")
+                return item["url"], None
             if item.get("base64") or item.get("b64"):
                 b64data = item.get("base64") or item.get("b64")
-                import base64
-                return base64.b64decode(b64data), "image/png"
+                return None, base64.b64decode(b64data)
             if item.get("image") and isinstance(item.get("image"), str):
                 # maybe "image" holds base64
-                import base64
-                return base64.b64decode(item.get("image")), "image/png"
+                return None, base64.b64decode(item.get("image"))
     # 3) Try to find any url inside nested structures
     def find_first_url(obj):
-        if isinstance(obj, dict):
-            for k, v in obj.items():
-                if isinstance(v, str) and v.startswith("http"):
-                    return v
-                found = find_first_url(v)
-                if found:
-                    return found
-        if isinstance(obj, list):
-            for el in obj:
-                found = find_first_url(el)
-                if found:
-                    return found
+        # iterative depth-first search: no recursion limit on deeply nested results
+        stack = [obj]
+        while stack:
+            x = stack.pop()
+            if isinstance(x, dict):
+                # push in reverse so values are visited in their original order
+                stack.extend(reversed(list(x.values())))
+            elif isinstance(x, list):
+                stack.extend(reversed(x))
+            elif isinstance(x, str) and x.startswith("http"):
+                return x
         return None
 
-    any_url = find_first_url(result_json)
-    if any_url:
-        resp = requests.get(any_url, timeout=30)
+    return find_first_url(result_json), None
+
+class _ResponseStream(RawIOBase):
+    """Read-only file-like view over a streamed httpx response body (decoded per Content-Encoding)."""
+    def __init__(self, resp: httpx.Response):
+        self._resp = resp
+        self._chunks = resp.iter_bytes()
+        self._pending = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            self._pending = next(self._chunks, None)
+            if self._pending is None:
+                self._pending = b""
+                return 0
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._resp.close()
+        super().close()
+
+def open_image_from_result(result_json):
+    """
+    Return the image as a readable file-like object and its mime type, or (None, None).
+    URL results are read straight off the download socket, so the image is never fully buffered.
+    The caller is responsible for closing the returned object.
+    """
+    url, image_bytes = find_image_source(result_json)
+    if image_bytes:
+        return BytesIO(image_bytes), "image/png"
+    if not url:
+        return None, None
+
+    # Image URLs point outside the DO inference API, so never forward our credentials there
+    req = HTTP.build_request("GET", url, timeout=IMAGE_TIMEOUT)
+    req.headers.pop("Authorization", None)
+    req.headers.pop("Content-Type", None)
+    # follow CDN redirects; httpx rebuilds redirected requests from this one, so the credentials stay stripped
+    resp = HTTP.send(req, stream=True, follow_redirects=True)
+    try:
         resp.raise_for_status()
-        return resp.content, resp.headers.get("Content-Type", "image/png")
+    except Exception:
+        resp.close()
+        raise
+    return _ResponseStream(resp), resp.headers.get("Content-Type", "image/png")
+
+def stream_image_from_result(result_json):
+    """
+    Like open_image_from_result, but returns a streaming Flask Response so the image is passed
+    through to the client without buffering it. Returns None if no image is found.
+    """
+    image_file, content_type = open_image_from_result(result_json)
+    if image_file is None:
+        return None
 
-    return None, None
+    chunks = iter(lambda: image_file.read(IMAGE_STREAM_CHUNK_SIZE), b"")
+    response = Response(stream_with_context(chunks), mimetype=content_type or "image/png")
+    # the WSGI server always closes the response, even if the client disconnects before the
+    # first chunk is pulled, so this is what reliably releases the download connection
+    response.call_on_close(image_file.close)
+    return response
+
+# str.translate table for filenames: keeps alphanumerics, space, '-' and '_', drops everything else.
+# ASCII entries are prebuilt; other code points are classified on lookup without being stored,
+# so arbitrary user prompts cannot grow the table.
+class _FilenameCharTable(dict):
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        return char if char.isalnum() else None
+
+_SAFE_FILENAME_CHARS = _FilenameCharTable(
+    (i, chr(i) if chr(i).isalnum() or chr(i) in " -_" else None) for i in range(128)
+)
 
 # --- Routes ---
 @app.route('/')
@@ -208,27 +543,29 @@ def generate_image():
         # build input for DO model (include options inside input)
         input_payload = {"prompt": prompt, **options}
 
-        start_resp = start_async_inference(model_id=model_id, input_payload=input_payload)
-        # expected to contain a request id in several possible shapes
-        request_id = start_resp.get("request_id") or start_resp.get("id") or start_resp.get("requestId")
-        if not request_id:
-            # If no request id available, return the start response for debugging
-            return jsonify({"error": "Unexpected async-invoke response", "response": start_resp}), 500
+        # Start the job and poll until complete, inside this route's bulkhead
+        final_result = GENERATE_BULKHEAD.run(run_inference, model_id, input_payload, timeout=INFERENCE_WAIT_TIMEOUT)
 
-        # Poll until complete
-        final_result = poll_until_complete(request_id, timeout_seconds=DEFAULT_POLL_TIMEOUT, poll_interval=DEFAULT_POLL_INTERVAL)
-
-        # extract image bytes (download from returned URL or decode base64)
-        img_bytes, content_type = extract_image_bytes_from_result(final_result)
-        if not img_bytes:
+        # stream the image through (from the returned URL, or decoded base64)
+        image_response = stream_image_from_result(final_result)
+        if image_response is None:
             return jsonify({"error": "No image found in inference result", "result": final_result}), 500
 
         # Return image directly
-        return send_file(BytesIO(img_bytes), mimetype=content_type or "image/png")
+        return image_response
     except TimeoutError as te:
         app.logger.error(te)
         return jsonify({"error": "Inference job timed out", "details": str(te)}), 504
-    except requests.HTTPError as he:
+    except BreakerOpen as bo:
+        app.logger.warning(bo)
+        return jsonify({"error": "Inference service unavailable", "details": str(bo)}), 503, {"Retry-After": str(math.ceil(bo.retry_after))}
+    except BulkheadFull as bf:
+        app.logger.warning(bf)
+        return jsonify({"error": "Server busy", "details": str(bf)}), 503
+    except UnexpectedInferenceResponse as ue:
+        # If no request id available, return the start response for debugging
+        return jsonify({"error": "Unexpected async-invoke response", "response": ue.response}), 500
+    except httpx.HTTPStatusError as he:
         app.logger.error(f"HTTP error during inference: {he} - response: {getattr(he, 'response', None)}")
         return jsonify({"error": "HTTP error during inference", "details": str(he)}), 502
     except Exception as e:
@@ -255,25 +592,23 @@ def upload_image_to_spaces():
 
     try:
         input_payload = {"prompt": prompt, **options}
-        start_resp = start_async_inference(model_id=model_id, input_payload=input_payload)
-        request_id = start_resp.get("request_id") or start_resp.get("id") or start_resp.get("requestId")
-        if not request_id:
-            return jsonify({"error": "Unexpected async-invoke response", "response": start_resp}), 500
-
-        final_result = poll_until_complete(request_id, timeout_seconds=DEFAULT_POLL_TIMEOUT, poll_interval=DEFAULT_POLL_INTERVAL)
+        final_result = UPLOAD_BULKHEAD.run(run_inference, model_id, input_payload, timeout=INFERENCE_WAIT_TIMEOUT)
 
-        # extract image bytes
-        img_bytes, content_type = extract_image_bytes_from_result(final_result)
-        if not img_bytes:
+        # open the image as a stream so it can be piped into Spaces
+        img_file, content_type = open_image_from_result(final_result)
+        if img_file is None:
             return jsonify({"error": "No image found in inference result", "result": final_result}), 500
 
         # prepare filename
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_id = str(uuid.uuid4())[:8]
-        safe_prompt = "".join(c for c in (prompt or "")[:30] if c.isalnum() or c in (' ', '-', '_')).rstrip().replace(' ', '_')
+        timestamp = time.strftime('%Y%m%d_%H%M%S')
+        unique_id = uuid.uuid4().hex[:8]
+        safe_prompt = (prompt or "")[:30].translate(_SAFE_FILENAME_CHARS).rstrip().replace(' ', '_')
         filename = f"generated_images/{safe_prompt}_{timestamp}_{unique_id}.png"
 
-        upload_url = upload_to_spaces(img_bytes, filename)
+        try:
+            upload_url = upload_to_spaces(img_file, filename)
+        finally:
+            img_file.close()
         if upload_url:
             return jsonify({
                 "success": True,
@@ -286,6 +621,15 @@ def upload_image_to_spaces():
     except TimeoutError as te:
         app.logger.error(te)
         return jsonify({"error": "Inference job timed out", "details": str(te)}), 504
+    except BreakerOpen as bo:
+        app.logger.warning(bo)
+        return jsonify({"error": "Inference service unavailable", "details": str(bo)}), 503, {"Retry-After": str(math.ceil(bo.retry_after))}
+    except BulkheadFull as bf:
+        app.logger.warning(bf)
+        return jsonify({"error": "Server busy", "details": str(bf)}), 503
+    except UnexpectedInferenceResponse as ue:
+        # If no request id available, return the start response for debugging
+        return jsonify({"error": "Unexpected async-invoke response", "response": ue.response}), 500
     except Exception as e:
         app.logger.exception("Error during image generation or upload")
         return jsonify({"error": "Failed to generate or upload image", "details": str(e)}), 500
@@ -0,0 +1,18 @@
+# gunicorn_conf.py
+# Production server config: gunicorn -c gunicorn_conf.py app:app
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+
+# Requests spend most of their time waiting on DO inference polls, so use threaded workers.
+# Keep threads above GENERATE_MAX_CONCURRENCY + UPLOAD_MAX_CONCURRENCY so /health always gets a thread.
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+
+# Silent-worker timeout; gthread workers keep heartbeating while request threads wait on polls
+timeout = 120
+keepalive = 75
+
+# Heartbeat files on tmpfs so workers are not killed by slow disk I/O
+worker_tmp_dir = "/dev/shm"